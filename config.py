@@ -0,0 +1,32 @@
+"""
+Shared database settings for the Arcanum App scripts.
+
+Loads `.env` (variables already set in the environment take
+precedence) and exposes the SQLite path and PostgreSQL connection
+settings used by both `main.py` and `delete.py`.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# === Load environment (.env never overrides variables already set) ===
+load_dotenv()
+
+# === SQLite: use SQLITE_PATH if set, else fallback ===
+SQLITE_PATH = os.getenv(
+    "SQLITE_PATH",
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "db",
+            "chatvault.sqlite"
+        )
+    )
+)
+
+# === PostgreSQL ===
+PG_HOST = os.getenv("PG_HOST", "127.0.0.1")
+PG_PORT = os.getenv("PG_PORT", "5432")
+PG_DATABASE = os.getenv("PG_DATABASE")
+PG_USER = os.getenv("PG_USER")
+PG_PASSWORD = os.getenv("PG_PASSWORD")
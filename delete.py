@@ -2,113 +2,186 @@
 Database table cleanup script for the Arcanum application.
 
 Connects to PostgreSQL and SQLite databases using credentials
-from environment variables and drops the `messages` and `chats`
-tables if they exist. Intended for development or reset purposes only.
+from environment variables and empties the `messages` and `chats`
+tables. Existing tables are truncated by default to avoid schema
+churn; `--hard` drops them instead. Intended for development or reset
+purposes only.
 """
 
-import os
+import atexit
 import logging
 import argparse
 import sqlite3
-import psycopg2
-from dotenv import load_dotenv
-
-# === Load environment ===
-load_dotenv()
-
-# === SQLite: use SQLITE_PATH if set, else fallback ===
-SQLITE_PATH = os.getenv(
-    "SQLITE_PATH",
-    os.path.abspath(
-        os.path.join(
-            os.path.dirname(__file__),
-            "db",
-            "chatvault.sqlite"
-        )
-    )
-)
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
+
+from config import (PG_DATABASE, PG_HOST, PG_PASSWORD, PG_PORT, PG_USER,
+                    SQLITE_PATH)
 
-# === PostgreSQL ===
-PG_HOST = os.getenv("PG_HOST", "127.0.0.1")
-PG_PORT = os.getenv("PG_PORT", "5432")
-PG_DATABASE = os.getenv("PG_DATABASE")
-PG_USER = os.getenv("PG_USER")
-PG_PASSWORD = os.getenv("PG_PASSWORD")
+# psycopg2 is imported on first use so --sqlite-only runs skip loading it
+if TYPE_CHECKING:
+    from psycopg2.pool import ThreadedConnectionPool
 
 # === Logger configuration ===
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
+# === PostgreSQL connection pool (created on first use) ===
+_PG_POOL: "ThreadedConnectionPool | None" = None
 
-def drop_pg_tables() -> None:
+
+def get_pg_pool() -> "ThreadedConnectionPool":
     """
-    Drop the 'messages' and 'chats' tables in PostgreSQL.
+    Return the shared PostgreSQL connection pool, creating it if needed.
 
-    Connects using `DATABASE_URL` from environment variables.
-    Executes SQL statements to drop both tables and commits the changes.
+    The pool is closed automatically at interpreter exit.
 
-    :raises psycopg2.DatabaseError: If connection or execution fails.
+    :return: Threaded psycopg2 connection pool.
+    :raises psycopg2.DatabaseError: If the initial connection fails.
     """
-    logger.info("[DROP] Connecting to PostgreSQL...")
-    conn = None
-    cur = None
-    try:
-        conn = psycopg2.connect(
+    global _PG_POOL
+    if _PG_POOL is None:
+        from psycopg2.pool import ThreadedConnectionPool
+
+        _PG_POOL = ThreadedConnectionPool(
+            minconn=1,
+            maxconn=4,
             host=PG_HOST,
             port=PG_PORT,
             dbname=PG_DATABASE,
             user=PG_USER,
             password=PG_PASSWORD
         )
-        cur = conn.cursor()
+        atexit.register(_PG_POOL.closeall)
+    return _PG_POOL
 
-        logger.info(
-           "[DROP] Dropping 'messages' and 'chats' tables (if exist)..."
-        )
-        cur.execute("DROP TABLE IF EXISTS messages;")
-        cur.execute("DROP TABLE IF EXISTS chats;")
+
+def drop_pg_tables(hard: bool = False) -> None:
+    """
+    Reset the 'messages' and 'chats' tables in PostgreSQL.
+
+    Borrows a connection from the shared pool configured via
+    `PG_*` environment variables. If both tables exist and `hard` is
+    not set, they are truncated and their ID sequences restarted;
+    otherwise both are dropped with a single statement.
+
+    :param hard: Drop the tables even if they exist.
+    :raises psycopg2.DatabaseError: If connection or execution fails.
+    """
+    import psycopg2
+
+    logger.info("[DROP] Connecting to PostgreSQL...")
+    pool = None
+    conn = None
+    try:
+        pool = get_pg_pool()
+        conn = pool.getconn()
+
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT to_regclass('messages') IS NOT NULL "
+                "AND to_regclass('chats') IS NOT NULL;"
+            )
+            if not hard and cur.fetchone()[0]:
+                logger.info(
+                    "[DROP] Truncating 'messages' and 'chats' tables..."
+                )
+                cur.execute("TRUNCATE TABLE messages, chats RESTART IDENTITY;")
+                action = "truncated"
+            else:
+                logger.info(
+                   "[DROP] Dropping 'messages' and 'chats' tables "
+                   "(if exist)..."
+                )
+                cur.execute("DROP TABLE IF EXISTS messages, chats;")
+                action = "deleted"
 
         conn.commit()
         logger.info(
-            "✅ PostgreSQL tables 'messages' and 'chats' deleted successfully."
+            "✅ PostgreSQL tables 'messages' and 'chats' %s successfully.",
+            action
         )
 
     except psycopg2.DatabaseError as e:
         logger.error("[DROP] Database error: %s", e)
+        if conn and not conn.closed:
+            # A dead connection fails the rollback too; keep the
+            # original error as the one that propagates
+            try:
+                conn.rollback()
+            except psycopg2.Error as rollback_error:
+                logger.error("[DROP] Rollback failed: %s", rollback_error)
         raise
     finally:
-        if cur:
-            cur.close()
         if conn:
-            conn.close()
-            logger.info("[DROP] Connection closed.")
+            pool.putconn(conn)
+            logger.info("[DROP] Connection returned to pool.")
 
 
-def drop_sqlite_tables() -> None:
+def drop_sqlite_tables(hard: bool = False) -> None:
     """
-    Drop the 'messages' and 'chats' tables in SQLite.
+    Reset the 'messages' and 'chats' tables in SQLite.
 
-    Connects using `SQLITE_PATH` from environment variables.
-    Executes SQL statements to drop both tables and commits the changes.
+    Connects using `SQLITE_PATH` from environment variables. If both
+    tables exist and `hard` is not set, their rows, AUTOINCREMENT
+    counters and full-text index entries are deleted; otherwise they
+    are dropped along with `messages_fts`. Either way the statements
+    run as one script wrapped in one transaction.
 
+    :param hard: Drop the tables even if they exist.
     :raises sqlite3.DatabaseError: If connection or execution fails.
     """
     logger.info("[DROP|SQLite] Connecting to SQLite...")
     conn = None
     try:
-        conn = sqlite3.connect(SQLITE_PATH)
+        # Autocommit: the explicit BEGIN/COMMIT below is the only transaction
+        conn = sqlite3.connect(SQLITE_PATH, isolation_level=None)
+        # WAL + synchronous=NORMAL: fewer fsyncs, readers not blocked
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         cur = conn.cursor()
 
-        logger.info(
-            "[DROP|SQLite] Dropping 'messages' and 'chats' tables "
-            "(if exist)..."
+        cur.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name IN ('messages', 'chats', 'messages_fts');"
         )
-        cur.execute("DROP TABLE IF EXISTS messages;")
-        cur.execute("DROP TABLE IF EXISTS chats;")
-
-        conn.commit()
+        tables = {name for (name, ) in cur.fetchall()}
+        if not hard and {"messages", "chats"} <= tables:
+            logger.info(
+                "[DROP|SQLite] Clearing 'messages' and 'chats' tables..."
+            )
+            # External-content FTS index must be emptied explicitly
+            clear_fts = (
+                "INSERT INTO messages_fts(messages_fts) "
+                "VALUES ('delete-all');"
+                if "messages_fts" in tables else ""
+            )
+            cur.executescript(
+                "BEGIN;"
+                f"{clear_fts}"
+                "DELETE FROM messages;"
+                "DELETE FROM chats;"
+                "DELETE FROM sqlite_sequence "
+                "WHERE name IN ('messages', 'chats');"
+                "COMMIT;"
+            )
+            action = "truncated"
+        else:
+            logger.info(
+                "[DROP|SQLite] Dropping 'messages' and 'chats' tables "
+                "(if exist)..."
+            )
+            cur.executescript(
+                "BEGIN;"
+                "DROP TABLE IF EXISTS messages_fts;"
+                "DROP TABLE IF EXISTS messages;"
+                "DROP TABLE IF EXISTS chats;"
+                "COMMIT;"
+            )
+            action = "deleted"
         logger.info(
-            "✅ SQLite tables 'messages' and 'chats' deleted successfully."
+            "✅ SQLite tables 'messages' and 'chats' %s successfully.",
+            action
         )
 
     except sqlite3.DatabaseError as e:
@@ -120,10 +193,31 @@ def drop_sqlite_tables() -> None:
             logger.info("[DROP|SQLite] Connection closed.")
 
 
+def drop_all_tables(hard: bool = False) -> None:
+    """
+    Reset the tables in PostgreSQL and SQLite concurrently.
+
+    Both drops are I/O-bound and independent, so they run in two
+    worker threads; the first raised error is propagated.
+
+    :param hard: Drop the tables instead of truncating them.
+    :raises psycopg2.DatabaseError: If the PostgreSQL drop fails.
+    :raises sqlite3.DatabaseError: If the SQLite drop fails.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(drop_pg_tables, hard),
+            executor.submit(drop_sqlite_tables, hard)
+        ]
+        for future in as_completed(futures):
+            future.result()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description=(
-            "Drop 'messages' and 'chats' tables in PostgreSQL and/or SQLite."
+            "Truncate or drop 'messages' and 'chats' tables in "
+            "PostgreSQL and/or SQLite."
         )
     )
     parser.add_argument(
@@ -136,6 +230,11 @@ if __name__ == "__main__":
         action="store_true",
         help="Drop only SQLite tables."
     )
+    parser.add_argument(
+        "--hard",
+        action="store_true",
+        help="Drop the tables instead of truncating them."
+    )
 
     args = parser.parse_args()
 
@@ -145,15 +244,13 @@ if __name__ == "__main__":
                 "[WARN] Both --pg-only and --sqlite-only specified. "
                 "Doing both."
             )
-            drop_pg_tables()
-            drop_sqlite_tables()
+            drop_all_tables(args.hard)
         elif args.pg_only:
-            drop_pg_tables()
+            drop_pg_tables(args.hard)
         elif args.sqlite_only:
-            drop_sqlite_tables()
+            drop_sqlite_tables(args.hard)
         else:
-            drop_pg_tables()
-            drop_sqlite_tables()
+            drop_all_tables(args.hard)
 
     except KeyboardInterrupt:
         logger.warning("[INTERRUPT] Operation cancelled by user.")
@@ -2,14 +2,18 @@
 Chat extractor module for Telegram HTML export (Arcanum App).
 
 Provides a function to extract structured metadata about chats from
-an exported Telegram HTML file using BeautifulSoup.
+the tables of an exported Telegram HTML file parsed with lxml.
 """
 
 import re
+import sys
 import logging
-from bs4 import BeautifulSoup
-from extractors.slugify_utils import slugify
-from extractors.time_utils import parse_datetime
+from bisect import bisect_right
+from collections.abc import Iterable
+import lxml.html
+from lxml import etree
+from extractors.slugify_utils import unique_slugs
+from extractors.time_utils import parse_short_date
 
 logger = logging.getLogger(__name__)
 
@@ -19,87 +23,192 @@ DATE_ICON = "\U0001F4C5"
 ID_ICON = "\U0001F194"
 WARNING_SIGN = "\u26A0\uFE0F"
 
+# === Precompiled patterns ===
+JOINED_SUFFIX_RE = re.compile(r"\s*\(joined the group.*?\)")
+JOINED_DATE_RE = re.compile(
+    r"joined the group\s+(\d{1,2}[./]\d{1,2}[./]\d{2,4})"
+)
 
-def extract_chats(soup: BeautifulSoup) -> list[dict]:
+
+def ask(prompt: str) -> str:
+    """
+    Write a prompt and read one line from stdin, stripped of whitespace.
+
+    A lighter replacement for `input()`; returns '' on end of input.
+
+    :param prompt: Prompt text to display.
+    :return: User's answer without surrounding whitespace.
+    """
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    return sys.stdin.readline().strip()
+
+
+def prompt_chat_attributes() -> tuple[int | None, bool, bool, bool]:
+    """
+    Interactively ask for the user-confirmed attributes of a chat.
+
+    :return: Tuple of (chat_id, is_active, is_member, is_public).
+    """
+    # === Prompt for chat_id ===
+    while True:
+        chat_id_input = ask(
+            "Enter chat_id (digits only, or press Enter to skip): "
+        )
+        if not chat_id_input:
+            chat_id = None
+            break
+        if chat_id_input.isdigit():
+            chat_id = int(chat_id_input)
+            break
+        print(
+            f"{WARNING_SIGN}  Chat ID must be numeric or empty. "
+            "Please try again."
+        )
+
+    # === Prompt for active/member/public ===
+    is_active = ask(
+        "Is this chat active? (y/n, default y): "
+    ).lower() != "n"
+
+    if is_active:
+        is_member = ask(
+            "Are they a member of this chat? (y/n, default y): "
+        ).lower() != "n"
+        is_public = ask(
+            "Is this chat public? (y/n, default y): "
+        ).lower() != "n"
+    else:
+        is_member = False
+        is_public = False
+
+    return chat_id, is_active, is_member, is_public
+
+
+def manifest_chat_attributes(
+        entry: dict) -> tuple[int | None, bool, bool, bool]:
+    """
+    Read the user-confirmed attributes of a chat from a manifest entry.
+
+    Missing flags follow the interactive defaults: 'yes' for an active
+    chat, 'no' for an inactive one.
+
+    :param entry: Manifest entry (e.g., one item of chats.json).
+    :return: Tuple of (chat_id, is_active, is_member, is_public).
+    """
+    chat_id = entry.get("chat_id")
+    is_active = bool(entry.get("is_active", True))
+    is_member = bool(entry.get("is_member", is_active))
+    is_public = bool(entry.get("is_public", is_active))
+    return chat_id, is_active, is_member, is_public
+
+
+def find_joined_dates(captions: list[str]) -> list[str | None]:
+    """
+    Find the 'joined the group' date of each caption in a single scan.
+
+    Captions are joined with a NUL separator (neither whitespace nor a
+    digit, so no match can span two captions) and scanned once; match
+    offsets are mapped back to caption indexes with `bisect`.
+
+    :param captions: Caption texts, in document order.
+    :return: Date strings ('YYYY-MM-DD') or None, aligned with `captions`.
     """
-    Extract chat information from a parsed Telegram export HTML soup.
+    starts = []
+    offset = 0
+    for text in captions:
+        starts.append(offset)
+        offset += len(text) + 1
+
+    dates: list[str | None] = [None] * len(captions)
+    found = [False] * len(captions)
+    for match in JOINED_DATE_RE.finditer("\0".join(captions)):
+        index = bisect_right(starts, match.start()) - 1
+        if not found[index]:
+            found[index] = True
+            dates[index] = parse_short_date(match.group(1))
+
+    return dates
+
+
+def extract_chats(tables: Iterable[etree._Element],
+                  manifest: dict[str, dict] | None = None) -> list[dict]:
+    """
+    Extract chat information from the tables of a Telegram export.
+
+    Only tables with a <caption> are treated as chats. Each table is
+    serialized to `table_html` as soon as it is read, so `tables` may
+    be a streaming iterator (see `iter_tables`) that discards elements
+    once they have been consumed.
 
     For each chat, extracts:
       - name, slug, link, join date, and user-confirmed attributes.
 
-    :param soup: Parsed BeautifulSoup object of the HTML
+    User-confirmed attributes are taken from `manifest` when it has an
+    entry for the chat's slug; otherwise the user is prompted.
+
+    :param tables: Top-level <table> elements, in document order
+    :param manifest: Optional mapping of slug to saved chat attributes
     :return: List of dictionaries with chat information
     """
-    chat_data = []
+    parsed = []
+
+    # === First pass: read captions ===
+    for table in tables:
+        # <caption> must be the first child of a table; check it directly
+        caption = table[0] if len(table) else None
+        if caption is None or caption.tag != "caption":
+            caption = table.find("caption")
+            if caption is None:
+                continue
+
+        # itertext() works on both HtmlElement and plain etree elements
+        caption_text = "".join(caption.itertext()).strip()
+        # Plain-text captions have no child elements to search
+        link_tag = caption.find(".//a") if len(caption) else None
+
+        name = (
+            "".join(link_tag.itertext()).strip() if link_tag is not None
+            else caption_text
+        )
+        name = JOINED_SUFFIX_RE.sub("", name).strip()
 
-    for table in soup.find_all("table"):
-        caption = table.find("caption")
-        if not caption:
-            continue
+        link = link_tag.get("href") if link_tag is not None else None
 
-        caption_text = caption.text.strip()
-        link_tag = caption.find("a")
+        table_html = lxml.html.tostring(table, with_tail=False)
 
-        name = link_tag.text.strip() if link_tag else caption_text
-        name = re.sub(r"\s*\(joined the group.*?\)", "", name).strip()
+        parsed.append((table_html, name, link, caption_text))
 
-        link = (
-            link_tag["href"] if link_tag and link_tag.has_attr("href")
-            else None
-        )
+    # === Find all joined dates in one regex scan ===
+    joined_dates = find_joined_dates([text for *_, text in parsed])
 
-        match = re.search(
-            r"joined the group\s+(\d{1,2}[./]\d{1,2}[./]\d{2,4})", caption_text
-        )
-        joined_date = (
-            parse_datetime(match.group(1), return_date_only=True)
-            if match else None
-        )
+    # === Resolve slug collisions across all chats at once ===
+    slugs = unique_slugs([name for _, name, _, _ in parsed])
 
-        slug = slugify(name)
-
-        print("\n" + "=" * 30)
-        print(f"{PIN_ICON}  Name: {name}")
-        print(f"{LINK_ICON}  Link: {link or '(none)'}")
-        print(f"{DATE_ICON}  Joined: {joined_date or '(none)'}")
-        print(f"{ID_ICON}  Slug: {slug}")
-
-        # === Prompt for chat_id ===
-        while True:
-            chat_id_input = input(
-                "Enter chat_id (digits only, or press Enter to skip): "
-            ).strip()
-            if not chat_id_input:
-                chat_id = None
-                break
-            if chat_id_input.isdigit():
-                chat_id = int(chat_id_input)
-                break
-            print(
-                f"{WARNING_SIGN}  Chat ID must be numeric or empty. "
-                "Please try again."
-            )
+    chat_data = []
 
-        # === Prompt for active/member/public ===
-        is_active = input(
-            "Is this chat active? (y/n, default y): "
-        ).strip().lower() != "n"
-
-        if is_active:
-            is_member = (
-                input(
-                    "Are they a member of this chat? (y/n, default y): "
-                ).strip().lower()
-                != "n"
-            )
-            is_public = (
-                input(
-                    "Is this chat public? (y/n, default y): "
-                ).strip().lower() != "n"
+    for (table_html, name, link, _), joined_date, slug in zip(
+            parsed, joined_dates, slugs):
+        sys.stdout.write(
+            f"\n{'=' * 30}\n"
+            f"{PIN_ICON}  Name: {name}\n"
+            f"{LINK_ICON}  Link: {link or '(none)'}\n"
+            f"{DATE_ICON}  Joined: {joined_date or '(none)'}\n"
+            f"{ID_ICON}  Slug: {slug}\n"
+        )
+        sys.stdout.flush()
+
+        entry = manifest.get(slug) if manifest else None
+        if entry is not None:
+            chat_id, is_active, is_member, is_public = (
+                manifest_chat_attributes(entry)
             )
+            logger.info("[CHAT|MANIFEST] Using saved attributes for '%s'.",
+                        slug)
         else:
-            is_member = False
-            is_public = False
+            chat_id, is_active, is_member, is_public = (
+                prompt_chat_attributes()
+            )
 
         logger.info(
             "[CHAT|PARSE] Chat extracted: %s | ID=%s | active=%s | member=%s",
@@ -118,7 +227,7 @@ def extract_chats(soup: BeautifulSoup) -> list[dict]:
             "is_member": is_member,
             "is_public": is_public,
             "notes": None,
-            "table": table
+            "table_html": table_html
         })
 
     return chat_data
@@ -7,14 +7,17 @@ command-line filename input or interactive selection.
 
 import os
 import sys
-import glob
 import logging
 
 logger = logging.getLogger(__name__)
 WARNING_SIGN = "\u26A0\uFE0F"
 
+# === Paths ===
+HTML_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "data", "html"))
 
-def get_input_html_path() -> str:
+
+def get_input_html_path(args: list[str] | None = None) -> str:
     """
     Determine the path to the input HTML file for chat export.
 
@@ -23,14 +26,14 @@ def get_input_html_path() -> str:
         2. If none provided, scan `data/html/` for HTML files.
         3. If multiple found, prompt user to choose one.
 
+    :param args: Positional arguments to use instead of `sys.argv[1:]`.
     :return: Absolute path to selected HTML file.
     :raises SystemExit: On invalid input, not found, or cancellation.
     """
-    html_dir = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "..", "data", "html")
-    )
+    html_dir = HTML_DIR
 
-    args = sys.argv[1:]
+    if args is None:
+        args = sys.argv[1:]
     if len(args) > 1:
         logger.warning("[INPUT|HTML] Too many command-line arguments: %s", args)
         raise SystemExit(f"{WARNING_SIGN}  Too many arguments. Provide one filename or none.")
@@ -52,10 +55,16 @@ def get_input_html_path() -> str:
         return full_path
 
     # === Auto-detect .html files ===
-    html_files = sorted(
-        f for f in glob.glob(os.path.join(html_dir, "*.html"))
-        if os.path.isfile(f)
-    )
+    try:
+        with os.scandir(html_dir) as entries:
+            html_files = sorted(
+                entry.path for entry in entries
+                if entry.name.lower().endswith(".html")
+                and not entry.name.startswith(".")
+                and entry.is_file()
+            )
+    except FileNotFoundError:
+        html_files = []
 
     if not html_files:
         logger.warning("[INPUT|HTML] No HTML files found in %s", html_dir)
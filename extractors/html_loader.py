@@ -1,19 +1,24 @@
 """
 Provides functionality to load and parse an input HTML file containing
-chat export data. Wraps BeautifulSoup for consistent parsing and error
-handling.
+chat export data. Wraps lxml.html for consistent parsing and error
+handling, and offers a streaming table reader for large exports.
 """
 
 import os
-from bs4 import BeautifulSoup
+from collections.abc import Iterator
+import lxml.html
+from lxml import etree
+from lxml.html import HtmlElement
 
+# === Parser: exports are UTF-8, so libxml2 decodes the raw bytes ===
+HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
 
-def load_html(path: str) -> BeautifulSoup:
+
+def check_html_path(path: str) -> None:
     """
-    Load and parse an HTML file into a BeautifulSoup object.
+    Validate that `path` points to an existing HTML file.
 
     :param path: Path to the HTML file
-    :return: Parsed HTML as BeautifulSoup object
     :raises FileNotFoundError: If the file does not exist
     :raises ValueError: If the file extension is not .html or .htm
     """
@@ -23,8 +28,52 @@ def load_html(path: str) -> BeautifulSoup:
     if not path.lower().endswith((".html", ".htm")):
         raise ValueError(f"Not an HTML file: {path}")
 
-    with open(path, "r", encoding="utf-8") as f:
+
+def load_html(path: str) -> HtmlElement:
+    """
+    Load and parse an HTML file into an lxml document tree.
+
+    :param path: Path to the HTML file
+    :return: Root <html> element of the parsed document
+    :raises FileNotFoundError: If the file does not exist
+    :raises ValueError: If the file extension is not .html or .htm
+    """
+    check_html_path(path)
+
+    with open(path, "rb") as f:
         html = f.read()
 
-    soup = BeautifulSoup(html, "lxml")
-    return soup
+    root = lxml.html.document_fromstring(html, parser=HTML_PARSER)
+    return root
+
+
+def iter_tables(path: str) -> Iterator[etree._Element]:
+    """
+    Stream the top-level <table> elements of an HTML file.
+
+    Uses `etree.iterparse` so that only the table being handled (plus
+    its ancestors) is kept in memory: once the consumer moves on, the
+    table is cleared and detached along with any earlier siblings.
+    Tables nested inside another table are left to their parent.
+
+    The yielded element is only valid until the next iteration.
+
+    :param path: Path to the HTML file
+    :return: Iterator over fully parsed top-level tables
+    :raises FileNotFoundError: If the file does not exist
+    :raises ValueError: If the file extension is not .html or .htm
+    """
+    check_html_path(path)
+
+    for _, table in etree.iterparse(path, events=("end",), tag="table",
+                                    html=True, huge_tree=True,
+                                    encoding="utf-8"):
+        if next(table.iterancestors("table"), None) is not None:
+            continue
+
+        yield table
+
+        table.clear(keep_tail=False)
+        parent = table.getparent()
+        while table.getprevious() is not None:
+            del parent[0]
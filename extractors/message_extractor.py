@@ -2,20 +2,78 @@
 Message extractor module for Telegram HTML export (Arcanum App).
 
 Provides a function to extract individual messages from a Telegram chat
-represented as a <table> element parsed with BeautifulSoup.
+represented as a <table> element parsed with lxml.
 
 Each message includes core metadata and placeholders for media, tags, etc.
 """
 
 import re
+import sys
 import logging
-from bs4 import Tag
+import lxml.html
+from lxml.html import HtmlElement
 from extractors.time_utils import parse_datetime
 
 logger = logging.getLogger(__name__)
 
+# === Precompiled patterns ===
+NEWLINE_PADDING_RE = re.compile(r"[ \t]*(\n+)[ \t]*")
 
-def extract_messages(table: Tag, chat_slug: str) -> list[dict]:
+# === Shared empty placeholder for media/tags (serialized as []) ===
+EMPTY_ITEMS = ()
+
+# === Message dict template (copying is cheaper than a fresh literal) ===
+MESSAGE_TEMPLATE = {
+    "chat_slug": None,
+    "msg_id": None,
+    "timestamp": None,
+    "link": None,
+    "text": None,
+    "media": EMPTY_ITEMS,
+    "screenshot": None,
+    "tags": EMPTY_ITEMS,
+    "notes": None
+}
+
+
+def cell_text(el: HtmlElement) -> str:
+    """
+    Return the stripped text of an element, via `.text` for leaves.
+
+    Leaf cells are the common case, and `.text` avoids the XPath
+    `string()` evaluation behind `text_content()`.
+
+    :param el: Element to read.
+    :return: Stripped text content (may be empty).
+    """
+    if len(el):
+        return el.text_content().strip()
+    return el.text.strip() if el.text else ""
+
+
+def extract_text(cell: HtmlElement) -> str:
+    """
+    Collect the text of a message cell in a single pass.
+
+    Text segments are stripped and joined with blank lines; spaces and
+    tabs around line breaks inside a segment are removed on the way,
+    only for segments that actually contain a newline.
+
+    :param cell: <td> element holding the message text.
+    :return: Normalized message text (may be empty).
+    """
+    parts = []
+    for part in cell.itertext():
+        part = part.strip()
+        if not part:
+            continue
+        if "\n" in part:
+            part = NEWLINE_PADDING_RE.sub(r"\1", part)
+        parts.append(part)
+    return "\n\n".join(parts)
+
+
+def extract_messages(table: HtmlElement, chat_slug: str) -> list[dict]:
     """
     Extract messages from a specific Telegram chat table.
 
@@ -28,45 +86,61 @@ def extract_messages(table: Tag, chat_slug: str) -> list[dict]:
     :return: List of message dictionaries.
     """
     messages = []
+    chat_slug = sys.intern(chat_slug)
 
-    for row in table.find_all("tr"):
-        cols = row.find_all("td")
+    for row in table.iterfind(".//tr"):
+        cols = row.findall("td")
         if len(cols) != 3:
             continue
 
         id_cell, date_cell, text_cell = cols
 
         # Extract message ID and link
-        id_link = id_cell.find("a")
+        # A plain-text cell has no children to search
+        id_link = id_cell.find(".//a") if len(id_cell) else None
         raw_id = (
-            id_link.text.strip()
-            if id_link and id_link.text.strip()
-            else id_cell.text.strip()
-        )
+            cell_text(id_link) if id_link is not None else ""
+        ) or cell_text(id_cell)
 
-        msg_id = int(raw_id) if re.fullmatch(r"\d{1,10}", raw_id) else None
-        msg_link = id_link["href"] if id_link and id_link.has_attr("href") else None
+        msg_id = (
+            int(raw_id)
+            if raw_id.isascii() and raw_id.isdigit() and len(raw_id) <= 10
+            else None
+        )
+        msg_link = id_link.get("href") if id_link is not None else None
 
         # Extract timestamp
-        parsed_dt = parse_datetime(date_cell.text.strip())
+        parsed_dt = parse_datetime(cell_text(date_cell))
 
         # Extract and normalize message text
-        text = text_cell.get_text(separator="\n\n", strip=True)
-        text = re.sub(r"[ \t]*(\n+)[ \t]*", lambda m: m.group(1), text)
-
-        messages.append({
-            "chat_slug": chat_slug,
-            "msg_id": msg_id,
-            "timestamp": parsed_dt,
-            "link": msg_link,
-            "text": text or None,
-            "media": [],
-            "screenshot": None,
-            "tags": [],
-            "notes": None
-        })
+        text = extract_text(text_cell)
+
+        msg = MESSAGE_TEMPLATE.copy()
+        msg["chat_slug"] = chat_slug
+        msg["msg_id"] = msg_id
+        msg["timestamp"] = parsed_dt
+        msg["link"] = msg_link
+        msg["text"] = text or None
+        messages.append(msg)
 
     logger.info("[MSG|EXTRACT] Extracted %d messages from chat '%s'",
                 len(messages), chat_slug)
 
     return messages
+
+
+def extract_messages_from_html(table_html: bytes,
+                               chat_slug: str) -> list[dict]:
+    """
+    Extract messages from a serialized chat table.
+
+    Picklable entrypoint for worker processes: lxml elements cannot be
+    sent between processes, so the table is passed as HTML and
+    re-parsed before calling `extract_messages`.
+
+    :param table_html: Serialized <table> element (no tail text).
+    :param chat_slug: Slug of the parent chat.
+    :return: List of message dictionaries.
+    """
+    table = lxml.html.fragment_fromstring(table_html)
+    return extract_messages(table, chat_slug)
@@ -8,6 +8,11 @@ URL- and filename-safe slugs. Used for chat identifiers and file naming.
 import re
 import unicodedata
 import hashlib
+from collections import Counter
+from functools import lru_cache
+
+# === Precompiled patterns ===
+NON_SLUG_CHARS_RE = re.compile(r"[^a-z0-9 ]")
 
 # === Cyrillic to Latin transliteration map ===
 CYR_TO_LAT = {
@@ -46,6 +51,9 @@ CYR_TO_LAT = {
     "я": "ia"
 }
 
+# === Prebuilt str.translate table for CYR_TO_LAT ===
+CYR_TO_LAT_TABLE = str.maketrans(CYR_TO_LAT)
+
 
 def transliterate(text: str) -> str:
     """
@@ -57,30 +65,66 @@ def transliterate(text: str) -> str:
     :param text: Input string to transliterate.
     :return: Transliterated string in lowercase.
     """
-    return ''.join(CYR_TO_LAT.get(char, char) for char in text.lower())
+    return text.lower().translate(CYR_TO_LAT_TABLE)
 
 
+@lru_cache(maxsize=4096)
 def slugify(text: str, max_words: int = 3) -> str:
     """
     Convert an input string into a filesystem- and URL-safe slug.
 
     Applies Unicode normalization, transliteration, character filtering,
     and word limiting. Falls back to a hash-based slug if the result
-    is empty or non-alphanumeric.
+    is empty or non-alphanumeric. Results are memoized; the function
+    is pure, and uniqueness is handled separately by `unique_slugs`.
 
     :param text: Input string to slugify.
     :param max_words: Maximum number of words to include in the slug.
     :return: Slugified string (e.g., 'chat_name' or 'chat_ab12ef').
     """
     original_text = str(text) if text is not None else ""
-    text = unicodedata.normalize("NFKD", original_text)
+    # ASCII input has nothing to decompose, so NFKD is skipped
+    text = (
+        original_text if original_text.isascii()
+        else unicodedata.normalize("NFKD", original_text)
+    )
     text = transliterate(text)
-    text = re.sub(r"[^a-z0-9 ]", "", text)
+    text = NON_SLUG_CHARS_RE.sub("", text)
     words = text.strip().split()
     slug = "_".join(words[:max_words])
 
     if not slug or not any(char.isalnum() for char in slug):
-        hash_part = hashlib.sha1(original_text.encode("utf-8")).hexdigest()[:6]
+        hash_part = hashlib.blake2b(original_text.encode("utf-8"),
+                                    digest_size=3).hexdigest()
         return f"chat_{hash_part}"
 
     return slug
+
+
+def unique_slugs(texts: list[str], max_words: int = 3) -> list[str]:
+    """
+    Slugify a batch of strings, keeping the resulting slugs unique.
+
+    Slugs are computed in one pass; only those shared by several inputs
+    get a short hash suffix derived from the text and its occurrence
+    number, so results stay stable across runs on the same export.
+
+    :param texts: Input strings, in document order.
+    :param max_words: Maximum number of words to include in each slug.
+    :return: List of unique slugs aligned with `texts`.
+    """
+    slugs = [slugify(text, max_words) for text in texts]
+    counts = Counter(slugs)
+    if len(counts) == len(slugs):
+        return slugs
+
+    occurrences: Counter = Counter()
+    for i, (text, slug) in enumerate(zip(texts, slugs)):
+        if counts[slug] > 1:
+            key = f"{text}#{occurrences[text]}"
+            occurrences[text] += 1
+            digest = hashlib.blake2b(key.encode("utf-8"),
+                                     digest_size=3).hexdigest()
+            slugs[i] = f"{slug}_{digest}"
+
+    return slugs
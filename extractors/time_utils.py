@@ -6,13 +6,15 @@ of date/time strings into UTC ISO 8601 format.
 """
 
 import logging
-from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from datetime import date, datetime, timezone as dt_timezone
 from dateutil import parser as dateutil_parser
 from dateutil.parser import isoparse
 from pytz import timezone
 
 # === Configuration ===
 DEFAULT_TZ = timezone("Europe/Kyiv")
+UTC = dt_timezone.utc
 
 # === Logging ===
 logger = logging.getLogger(__name__)
@@ -25,9 +27,53 @@ def to_utc_iso(dt: datetime) -> str:
     :param dt: Datetime object
     :return: ISO-formatted UTC string
     """
-    return dt.astimezone(dt_timezone.utc).isoformat().replace("+00:00", "Z")
+    return dt.astimezone(UTC).isoformat().replace("+00:00", "Z")
 
 
+def parse_short_date(text: str) -> str | None:
+    """
+    Parse a numeric day-first date like '05.03.24' or '5/3/2024'.
+
+    A lightweight alternative to `parse_datetime` for strings already
+    validated as `D[./]M[./]Y`. Two-digit years map to 1970-2069.
+    Anything the split does not handle falls back to `parse_datetime`,
+    as before.
+
+    :param text: Date string with '.' or '/' separators.
+    :return: Date string in 'YYYY-MM-DD' format, or None on error.
+    """
+    try:
+        day, month, year = (int(part) for part in
+                            text.strip().replace(".", "/").split("/"))
+        if year < 100:
+            year += 2000 if year < 70 else 1900
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return parse_datetime(text, return_date_only=True)
+
+
+def parse_clock_date(text: str) -> datetime | None:
+    """
+    Parse a naive 'HH:MM:SS DD.MM.YYYY' timestamp by slicing.
+
+    Avoids `strptime` and dateutil for the fixed layout of export
+    timestamps; any other layout returns None.
+
+    :param text: Stripped timestamp string.
+    :return: Naive datetime, or None if the layout does not match.
+    """
+    if (len(text) != 19 or text[2] != ":" or text[5] != ":"
+            or text[8] != " " or text[11] != "." or text[14] != "."):
+        return None
+    try:
+        return datetime(int(text[15:19]), int(text[12:14]),
+                        int(text[9:11]), int(text[0:2]),
+                        int(text[3:5]), int(text[6:8]))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=100_000)
 def parse_datetime(text: str,
                    default_tz=DEFAULT_TZ,
                    day_first: bool = True,
@@ -35,8 +81,11 @@ def parse_datetime(text: str,
     """
     Parse a datetime string and optionally return only the date part.
 
-    Handles both ISO and flexible human-readable formats. Applies
-    default timezone to naive datetimes.
+    Tries the fixed 'HH:MM:SS DD.MM.YYYY' export layout and
+    `datetime.fromisoformat` first, then dateutil's ISO and flexible
+    human-readable parsers. Applies default timezone to naive
+    datetimes. Results are memoized, since exports repeat the same
+    timestamp strings many times.
 
     :param text: Input string with date and optional time.
     :param default_tz: Timezone to apply to naive datetimes.
@@ -46,18 +95,25 @@ def parse_datetime(text: str,
     """
     text = text.strip()
 
-    try:
-        dt = isoparse(text)
-        if dt.tzinfo is None:
-            dt = default_tz.localize(dt)
-    except ValueError:
+    dt = parse_clock_date(text)
+    if dt is None:
         try:
-            dt = dateutil_parser.parse(text, dayfirst=day_first)
-            if dt.tzinfo is None:
-                dt = default_tz.localize(dt)
-        except ValueError as e:
-            logger.error("[TIME|ERROR] Failed to parse datetime: %s", e)
-            return None
+            # Fast path: C-level ISO 8601 parser (accepts 'Z' since 3.11)
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            try:
+                dt = isoparse(text)
+            except ValueError:
+                try:
+                    dt = dateutil_parser.parse(text, dayfirst=day_first)
+                except ValueError as e:
+                    logger.error(
+                        "[TIME|ERROR] Failed to parse datetime: %s", e
+                    )
+                    return None
+
+    if dt.tzinfo is None:
+        dt = default_tz.localize(dt)
 
     if return_date_only:
         return dt.date().isoformat()
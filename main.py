@@ -2,163 +2,478 @@
 Telegram HTML parser and writer entrypoint (Arcanum App).
 
 Extracts chat and message data from a Telegram HTML export,
-and stores it in both SQLite and PostgreSQL databases. Also
-saves intermediate JSON summaries for each chat.
+and stores it in SQLite. When PostgreSQL is configured, the same
+data is mirrored there by background writer threads sharing a
+connection pool. Also saves intermediate JSON files for each chat,
+written behind the database inserts by background threads.
 """
 
 import os
+import queue
 import logging
+import argparse
 import sqlite3
-import psycopg2
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator
 from psycopg2 import DatabaseError as PGDatabaseError
-from dotenv import load_dotenv
+from psycopg2.extensions import connection as PGConnection
+from psycopg2.extensions import cursor as PGCursor
+from psycopg2.pool import ThreadedConnectionPool
 
-from extractors.html_loader import load_html
+from config import (PG_DATABASE, PG_HOST, PG_PASSWORD, PG_PORT, PG_USER,
+                    SQLITE_PATH)
+from extractors.html_loader import iter_tables
 from extractors.get_input_html import get_input_html_path
 from extractors.chat_extractor import extract_chats
-from extractors.message_extractor import extract_messages
-from storage.json_writer import save_chat_summary, save_messages_to_json
-from storage.db_writer import (ensure_tables as ensure_sqlite_tables,
+from extractors.message_extractor import extract_messages_from_html
+from storage.json_writer import (flush_chat_summaries, load_chat_manifest,
+                                 save_chat_summary, save_messages_to_json)
+from storage.db_writer import (enable_wal as enable_sqlite_wal,
+                               ensure_read_indexes as ensure_sqlite_indexes,
+                               ensure_search_index as ensure_sqlite_fts,
+                               ensure_tables as ensure_sqlite_tables,
                                insert_chat as insert_sqlite_chat,
-                               insert_message as insert_sqlite_message)
-from storage.db_pg_writer import (ensure_tables as ensure_pg_tables,
-                                  insert_chat as insert_pg_chat, insert_message
-                                  as insert_pg_message)
+                               insert_messages as insert_sqlite_messages,
+                               optimize as optimize_sqlite)
+from storage.db_pg_writer import (copy_messages as copy_pg_messages,
+                                  create_stage_table as create_pg_stage,
+                                  ensure_tables as ensure_pg_tables,
+                                  insert_chat as insert_pg_chat,
+                                  insert_messages as insert_pg_messages)
 
 # === Logging Configuration ===
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
-# === Load environment ===
-load_dotenv()
-
-# === SQLite: use SQLITE_PATH if set, else fallback ===
-SQLITE_PATH = os.getenv(
-    "SQLITE_PATH",
-    os.path.abspath(
-        os.path.join(
-            os.path.dirname(__file__),
-            "db",
-            "chatvault.sqlite"
-        )
+# === PostgreSQL ===
+# PostgreSQL mirroring is skipped entirely when no database is configured
+PG_ENABLED = bool(PG_DATABASE)
+PG_QUEUE_SIZE = 8
+# Writer threads (and pooled connections) mirroring chats to PostgreSQL
+PG_WRITERS = 4
+# Chats with at least this many messages are loaded with COPY
+PG_COPY_THRESHOLD = 1000
+
+# Pending message files, and threads writing them (one file per slug)
+JSON_QUEUE_SIZE = 8
+JSON_WRITERS = 4
+
+# Chats submitted for extraction ahead of the writer, per worker process
+EXTRACT_AHEAD = 2
+
+# Seconds a queue put waits before re-checking that its writers are alive
+PUT_TIMEOUT = 1.0
+
+# === Commit batching: one transaction per this many chats ===
+COMMIT_EVERY = 50
+
+
+def put_job(jobs: queue.Queue, job: object,
+            threads: list[threading.Thread]) -> bool:
+    """
+    Put a job on a bounded writer queue without blocking on dead writers.
+
+    Waits in `PUT_TIMEOUT` slices and gives up once none of the
+    consuming threads is alive, so a crashed writer surfaces as an
+    error instead of leaving the main thread blocked forever.
+
+    :param jobs: Bounded queue consumed by `threads`.
+    :param job: Job tuple, or `None` as the shutdown sentinel.
+    :param threads: Writer threads consuming `jobs`.
+    :return: True if the job was queued, False if no writer is left.
+    """
+    while any(thread.is_alive() for thread in threads):
+        try:
+            jobs.put(job, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def submit_extraction(executor: ProcessPoolExecutor, chats: Iterator[dict],
+                      in_flight: deque[tuple[dict, Future]]) -> bool:
+    """
+    Submit the next chat's message extraction to the worker pool.
+
+    The serialized table is popped from the chat, so it is released
+    as soon as the worker is done with it rather than kept alongside
+    the chat until the end of the import.
+
+    :param executor: Worker pool running `extract_messages_from_html`.
+    :param chats: Iterator over the chats not yet submitted.
+    :param in_flight: Queue of `(chat, future)` pairs, in chat order.
+    :return: True if a chat was submitted, False if none is left.
+    """
+    chat = next(chats, None)
+    if chat is None:
+        return False
+
+    future = executor.submit(
+        extract_messages_from_html, chat.pop("table_html"), chat["slug"]
     )
-)
+    in_flight.append((chat, future))
+    return True
 
-# === PostgreSQL ===
-PG_HOST = os.getenv("PG_HOST", "127.0.0.1")
-PG_PORT = os.getenv("PG_PORT", "5432")
-PG_DATABASE = os.getenv("PG_DATABASE")
-PG_USER = os.getenv("PG_USER")
-PG_PASSWORD = os.getenv("PG_PASSWORD")
+
+def json_writer(jobs: queue.Queue) -> None:
+    """
+    Write per-chat message files from a queue until a `None` sentinel.
+
+    Runs in one of `JSON_WRITERS` background threads so that writing
+    msg_{slug}.json overlaps with the SQLite inserts of the same chat
+    and with other chats' files. Slugs are unique, so no two threads
+    write the same file. A failed write is logged and does not stop
+    the import, nor this thread.
+
+    :param jobs: Queue of `(slug, messages)` tuples, shared by writers.
+    """
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+
+        slug, messages = job
+        try:
+            save_messages_to_json(slug, messages)
+        except OSError as e:
+            logger.error("[ERROR] Failed to write messages of '%s': %s",
+                         slug, e)
+        except Exception as e:
+            # Anything else (e.g. an unserializable value) must not
+            # kill the thread and leave the bounded queue unconsumed
+            logger.error("[ERROR] Failed to serialize messages of '%s': %s",
+                         slug, e)
 
 
-def get_chat_id_by_slug_sqlite(cursor: sqlite3.Cursor, slug: str) -> int:
+def pg_writer(pg_pool: ThreadedConnectionPool, jobs: queue.Queue,
+              failed: threading.Event) -> None:
     """
-    Get the internal chat ID from SQLite by its slug.
+    Mirror chats to PostgreSQL from a queue until a `None` sentinel.
 
-    :param cursor: SQLite cursor.
-    :param slug: Unique chat slug.
-    :return: Chat ID in the SQLite DB.
-    :raises ValueError: If the slug is not found.
+    Runs in one of `PG_WRITERS` background threads so that SQLite
+    writes never wait on PostgreSQL latency. Each thread borrows its
+    own connection from `pg_pool` for its whole run, with
+    `synchronous_commit` turned off and the COPY staging table created
+    once for that session. Each job is a
+    `(chat, messages)` tuple written under its own savepoint; the
+    transaction is committed every `COMMIT_EVERY` chats and once more
+    when the queue is closed.
+
+    An error outside a single chat's insert (e.g. the server going
+    away) stops the thread, and is recorded in `failed` so the main
+    thread stops feeding the mirror and reports it as incomplete.
+
+    :param pg_pool: Pool to borrow this thread's connection from.
+    :param jobs: Queue of `(chat, messages)` tuples, shared by writers.
+    :param failed: Event set when this writer stops on an error.
     """
-    cursor.execute("SELECT id FROM chats WHERE slug = ?", (slug, ))
-    row = cursor.fetchone()
-    if not row:
-        raise ValueError(f"[SQLite] Chat slug '{slug}' not found.")
-    return row[0]
+    pg_conn = pg_pool.getconn()
+    try:
+        with pg_conn.cursor() as pg_cur:
+            # Bulk load: commits skip the WAL flush wait; after a crash
+            # a rerun re-inserts the lost chats (duplicates are skipped)
+            pg_cur.execute("SET synchronous_commit TO OFF")
+            create_pg_stage(pg_cur)
+            pg_conn.commit()
+            write_pg_jobs(pg_conn, pg_cur, jobs)
+    except Exception as e:
+        # Connection loss (psycopg2.Error) or anything unexpected: the
+        # uncommitted batch is rolled back when the connection is put
+        # back, so the mirror must be reported as incomplete
+        logger.error("[ERROR] PostgreSQL writer stopped: %s", e)
+        failed.set()
+    finally:
+        pg_pool.putconn(pg_conn)
 
 
-def get_chat_id_by_slug_pg(cursor: psycopg2.extensions.cursor,
-                           slug: str) -> int:
+def write_pg_jobs(pg_conn: PGConnection, pg_cur: PGCursor,
+                  jobs: queue.Queue) -> None:
     """
-    Get the internal chat ID from PostgreSQL by its slug.
+    Write queued `(chat, messages)` jobs on one PostgreSQL connection.
+
+    A chat that fails to insert is rolled back to its savepoint and
+    skipped; an error that leaves the connection unusable (including
+    a failed rollback) is raised to the caller.
 
-    :param cursor: PostgreSQL cursor.
-    :param slug: Unique chat slug.
-    :return: Chat ID in the PostgreSQL DB.
-    :raises ValueError: If the slug is not found.
+    :param pg_conn: PostgreSQL connection owned by the calling thread.
+    :param pg_cur: Cursor of `pg_conn`.
+    :param jobs: Queue of `(chat, messages)` tuples.
+    :raises psycopg2.Error: If the connection can no longer be used.
     """
-    cursor.execute("SELECT id FROM chats WHERE slug = %s", (slug, ))
-    row = cursor.fetchone()
-    if not row:
-        raise ValueError(f"[Postgres] Chat slug '{slug}' not found.")
-    return row[0]
+    pending = 0
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+
+        chat, messages = job
+        pg_cur.execute("SAVEPOINT chat")
+        try:
+            pg_chat_ref_id = insert_pg_chat(pg_cur, chat)
+            if len(messages) >= PG_COPY_THRESHOLD:
+                copy_pg_messages(pg_cur, messages, pg_chat_ref_id)
+            else:
+                insert_pg_messages(pg_cur, messages, pg_chat_ref_id)
+            pg_cur.execute("RELEASE SAVEPOINT chat")
+            logger.info("[PG] Mirrored '%s' with %d messages.",
+                        chat["slug"], len(messages))
+        except (PGDatabaseError, ValueError, KeyError) as e:
+            logger.error(
+                "[ERROR] Failed to mirror chat '%s' to PostgreSQL: %s",
+                chat["slug"], e)
+            # On a lost connection this fails too (InterfaceError or
+            # OperationalError), which ends the writer in `pg_writer`
+            pg_cur.execute("ROLLBACK TO SAVEPOINT chat")
+            continue
+
+        pending += 1
+        if pending >= COMMIT_EVERY:
+            pg_conn.commit()
+            pending = 0
+
+    pg_conn.commit()
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line arguments for the parser entrypoint.
+
+    :return: Parsed arguments namespace.
+    """
+    parser = argparse.ArgumentParser(
+        description="Parse a Telegram HTML export into SQLite/PostgreSQL."
+    )
+    parser.add_argument(
+        "filename",
+        nargs="?",
+        help="HTML file in data/html/ (prompted if omitted)."
+    )
+    manifest_source = parser.add_mutually_exclusive_group()
+    manifest_source.add_argument(
+        "--chats-json",
+        metavar="PATH",
+        help=(
+            "Take chat attributes from this chats.json manifest instead "
+            "of prompting."
+        )
+    )
+    manifest_source.add_argument(
+        "--reuse-chats",
+        action="store_true",
+        help="Same as --chats-json with the saved data/json/chats.json."
+    )
+    return parser.parse_args()
 
 
 def main():
     """
     Run the full extraction and database insertion workflow.
     """
-    path = get_input_html_path()
-    soup = load_html(path)
-    chats = extract_chats(soup)
+    args = parse_args()
+    path = get_input_html_path([args.filename] if args.filename else [])
+
+    manifest = None
+    if args.chats_json or args.reuse_chats:
+        try:
+            manifest = load_chat_manifest(args.chats_json)
+        except (OSError, ValueError) as e:
+            logger.error("[ERROR] Failed to load chat manifest: %s", e)
+            return
+
+    chats = extract_chats(iter_tables(path), manifest)
+
+    # === Extract messages in worker processes; DB writes stay here ===
+    # The pool forks on the first submit, before any thread or database
+    # connection exists; only EXTRACT_AHEAD chats per worker are held
+    # in flight, so finished message lists never pile up in memory
+    workers = os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers)
+    unsubmitted = iter(chats)
+    in_flight = deque()
+    for _ in range(EXTRACT_AHEAD * workers):
+        if not submit_extraction(executor, unsubmitted, in_flight):
+            break
 
     os.makedirs(os.path.dirname(SQLITE_PATH), exist_ok=True)
 
-    sqlite_conn = pg_conn = None
-    sqlite_cur = pg_cur = None
+    sqlite_conn = sqlite_cur = pg_pool = None
     try:
         sqlite_conn = sqlite3.connect(SQLITE_PATH)
+        enable_sqlite_wal(sqlite_conn)
         sqlite_cur = sqlite_conn.cursor()
         ensure_sqlite_tables(sqlite_cur)
 
-        pg_conn = psycopg2.connect(
-            host=PG_HOST,
-            port=PG_PORT,
-            dbname=PG_DATABASE,
-            user=PG_USER,
-            password=PG_PASSWORD
-        )
-        pg_cur = pg_conn.cursor()
-        ensure_pg_tables(pg_cur)
+        if PG_ENABLED:
+            # All writer connections are opened up front so that
+            # connection errors surface here, not in a writer thread
+            pg_pool = ThreadedConnectionPool(
+                minconn=PG_WRITERS,
+                maxconn=PG_WRITERS,
+                host=PG_HOST,
+                port=PG_PORT,
+                dbname=PG_DATABASE,
+                user=PG_USER,
+                password=PG_PASSWORD
+            )
+            pg_conn = pg_pool.getconn()
+            try:
+                with pg_conn.cursor() as pg_cur:
+                    ensure_pg_tables(pg_cur)
+                pg_conn.commit()
+            finally:
+                pg_pool.putconn(pg_conn)
+        else:
+            logger.info("[PG] PG_DATABASE not set; PostgreSQL mirror skipped.")
     except (sqlite3.DatabaseError, PGDatabaseError) as e:
         logger.error("[ERROR] Failed to initialize databases: %s", e)
+        executor.shutdown(cancel_futures=True)
+        if sqlite_cur:
+            sqlite_cur.close()
+        if sqlite_conn:
+            sqlite_conn.close()
+        if pg_pool:
+            pg_pool.closeall()
         return
 
+    pg_jobs = None
+    pg_mirroring = pg_pool is not None
+    pg_threads = []
+    pg_failed = threading.Event()
+    if pg_pool:
+        pg_jobs = queue.Queue(maxsize=PG_QUEUE_SIZE)
+        for _ in range(PG_WRITERS):
+            pg_thread = threading.Thread(
+                target=pg_writer, args=(pg_pool, pg_jobs, pg_failed),
+                daemon=True
+            )
+            pg_thread.start()
+            pg_threads.append(pg_thread)
+
+    json_jobs = queue.Queue(maxsize=JSON_QUEUE_SIZE)
+    json_threads = []
+    for _ in range(JSON_WRITERS):
+        json_thread = threading.Thread(
+            target=json_writer, args=(json_jobs, ), daemon=True
+        )
+        json_thread.start()
+        json_threads.append(json_thread)
+
     total_messages = 0
 
-    for chat in chats:
+    # === Write each chat as its extraction finishes, in chat order ===
+    pending = 0
+    while in_flight:
+        chat, future = in_flight.popleft()
         try:
-            messages = extract_messages(chat["table"], chat["slug"])
+            messages = future.result()
+        except BrokenProcessPool as e:
+            # A killed worker (e.g. out of memory) fails every pending
+            # chat; keep what is done and drain the writers as usual
+            logger.error("[ERROR] Extraction workers died at '%s': %s; "
+                         "stopping the import.", chat["slug"], e)
+            break
+        except Exception as e:
+            # Raised in the worker (e.g. an lxml parser error) and
+            # re-raised here; only this chat is skipped
+            logger.error("[ERROR] Failed to extract messages of '%s': %s",
+                         chat["slug"], e)
+            submit_extraction(executor, unsubmitted, in_flight)
+            continue
+        # Keep the window full before the writes of this chat
+        submit_extraction(executor, unsubmitted, in_flight)
 
+        # One savepoint per chat inside a batch transaction; an
+        # explicit BEGIN keeps RELEASE from committing on its own;
+        # IMMEDIATE takes the write lock now, not mid-batch
+        if not sqlite_conn.in_transaction:
+            sqlite_conn.execute("BEGIN IMMEDIATE")
+        sqlite_cur.execute("SAVEPOINT chat")
+        try:
             save_chat_summary(chat)
-            save_messages_to_json(chat["slug"], messages)
-
-            insert_sqlite_chat(sqlite_cur, chat)
-            insert_pg_chat(pg_cur, chat)
+            if not put_job(json_jobs, (chat["slug"], messages),
+                           json_threads):
+                logger.error("[ERROR] JSON writers stopped; "
+                             "msg_%s.json not written.", chat["slug"])
 
-            sqlite_chat_ref_id = get_chat_id_by_slug_sqlite(
-                sqlite_cur, chat["slug"])
-            pg_chat_ref_id = get_chat_id_by_slug_pg(pg_cur, chat["slug"])
-
-            for msg in messages:
-                insert_sqlite_message(sqlite_cur, msg, sqlite_chat_ref_id)
-                insert_pg_message(pg_cur, msg, pg_chat_ref_id)
-
-            sqlite_conn.commit()
-            pg_conn.commit()
+            sqlite_chat_ref_id = insert_sqlite_chat(sqlite_cur, chat)
+            insert_sqlite_messages(sqlite_cur, messages,
+                                   sqlite_chat_ref_id)
+            sqlite_cur.execute("RELEASE chat")
 
             total_messages += len(messages)
 
             logger.info("[CHAT] Saved '%s' with %d messages.",
                         chat["slug"], len(messages))
-        except (sqlite3.DatabaseError, PGDatabaseError, KeyError) as e:
+        except (sqlite3.DatabaseError, ValueError, KeyError) as e:
             logger.error("[ERROR] Failed to process chat '%s': %s",
                          chat["slug"], e)
-            if sqlite_conn:
-                sqlite_conn.rollback()
-            if pg_conn:
-                pg_conn.rollback()
+            if not sqlite_conn.in_transaction:
+                # SQLITE_FULL, SQLITE_IOERR or SQLITE_NOMEM may roll
+                # back the whole batch, savepoint included
+                logger.error("[ERROR] SQLite rolled back the open batch; "
+                             "chats since the last commit are lost. "
+                             "Stopping the import.")
+                break
+            sqlite_cur.execute("ROLLBACK TO chat")
+            sqlite_cur.execute("RELEASE chat")
+            continue
+
+        pending += 1
+        if pending >= COMMIT_EVERY:
+            sqlite_conn.commit()
+            flush_chat_summaries()
+            pending = 0
+
+        if pg_mirroring and (pg_failed.is_set() or not put_job(
+                pg_jobs, (chat, messages), pg_threads)):
+            logger.error("[ERROR] PostgreSQL writers stopped; some chats "
+                         "were not mirrored.")
+            pg_mirroring = False
+
+    sqlite_conn.commit()
+    flush_chat_summaries()
+    # Chats still in flight are only left after the loop was stopped
+    executor.shutdown(cancel_futures=True)
+
+    # === Wait for the JSON files and the PostgreSQL mirror to drain ===
+    for _ in json_threads:
+        if not put_job(json_jobs, None, json_threads):
+            break
+    for json_thread in json_threads:
+        json_thread.join()
+    for _ in pg_threads:
+        if not put_job(pg_jobs, None, pg_threads):
+            break
+    for pg_thread in pg_threads:
+        pg_thread.join()
+    if pg_failed.is_set():
+        logger.error("[ERROR] PostgreSQL mirror is incomplete; rerun the "
+                     "import to fill it in (duplicates are skipped).")
+
+    # === Build read and full-text indexes once, after the bulk load ===
+    try:
+        ensure_sqlite_indexes(sqlite_cur)
+        ensure_sqlite_fts(sqlite_cur)
+        sqlite_conn.commit()
+    except sqlite3.DatabaseError as e:
+        logger.error("[ERROR] Failed to build SQLite indexes: %s", e)
+
+    try:
+        optimize_sqlite(sqlite_conn)
+    except sqlite3.DatabaseError as e:
+        logger.error("[ERROR] Failed to optimize SQLite database: %s", e)
 
     # === Proper cleanup after all chats processed ===
     if sqlite_cur:
         sqlite_cur.close()
     if sqlite_conn:
         sqlite_conn.close()
-    if pg_cur:
-        pg_cur.close()
-    if pg_conn:
-        pg_conn.close()
+    if pg_pool:
+        pg_pool.closeall()
 
     logger.info("[DONE] All chats and messages processed.")
     logger.info("🗂️  Chats processed: %d", len(chats))
@@ -4,13 +4,89 @@ PostgreSQL writer utilities for Telegram chat and message data (Arcanum App).
 Handles table creation and data insertion into a PostgreSQL database.
 """
 
+import io
 import logging
+import orjson
 from datetime import datetime, date
-from psycopg2.extras import Json
+from psycopg2.errors import UniqueViolation
+from psycopg2.extras import Json, execute_values
 from psycopg2.extensions import cursor as PGCursor
 
 logger = logging.getLogger(__name__)
 
+# === Statements reused across calls ===
+UPSERT_CHAT_SQL = """
+    INSERT INTO chats (
+        slug, chat_id, type, name, link, image,
+        joined, is_active, is_member, is_public, notes
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (slug) DO UPDATE SET
+        chat_id = EXCLUDED.chat_id,
+        type = EXCLUDED.type,
+        name = EXCLUDED.name,
+        link = EXCLUDED.link,
+        image = EXCLUDED.image,
+        joined = EXCLUDED.joined,
+        is_active = EXCLUDED.is_active,
+        is_member = EXCLUDED.is_member,
+        is_public = EXCLUDED.is_public,
+        notes = EXCLUDED.notes
+    RETURNING id
+"""
+INSERT_MESSAGES_SQL = """
+    INSERT INTO messages (
+        msg_id, chat_ref_id, timestamp, link, text,
+        media, screenshot, tags, notes
+    ) VALUES %s
+    ON CONFLICT (chat_ref_id, msg_id) WHERE msg_id IS NOT NULL
+    DO NOTHING
+"""
+MESSAGE_VALUES_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+# === COPY staging: rows land in a temp table, then move with ON CONFLICT ===
+CREATE_STAGE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS messages_stage (
+        msg_id BIGINT,
+        chat_ref_id INTEGER,
+        timestamp TIMESTAMPTZ,
+        link TEXT,
+        text TEXT,
+        media JSONB,
+        screenshot TEXT,
+        tags JSONB,
+        notes TEXT
+    )
+"""
+COPY_STAGE_SQL = """
+    COPY messages_stage (
+        msg_id, chat_ref_id, timestamp, link, text,
+        media, screenshot, tags, notes
+    ) FROM STDIN
+"""
+MOVE_STAGE_SQL = """
+    INSERT INTO messages (
+        msg_id, chat_ref_id, timestamp, link, text,
+        media, screenshot, tags, notes
+    )
+    SELECT msg_id, chat_ref_id, timestamp, link, text,
+           media, screenshot, tags, notes
+    FROM messages_stage
+    ON CONFLICT (chat_ref_id, msg_id) WHERE msg_id IS NOT NULL
+    DO NOTHING
+"""
+
+# === Pre-rendered value for the common empty media/tags case ===
+# Json() renders to a plain quoted literal, so '[]' binds identically
+EMPTY_JSON_ARRAY = "[]"
+
+# === COPY text-format escaping (backslash, tab, newline, CR) ===
+COPY_ESCAPE_TABLE = str.maketrans({
+    "\\": "\\\\",
+    "\t": "\\t",
+    "\n": "\\n",
+    "\r": "\\r"
+})
+
 
 def ensure_tables(cursor: PGCursor) -> None:
     """
@@ -36,6 +112,16 @@ def ensure_tables(cursor: PGCursor) -> None:
     """)
     logger.debug("[PG|SCHEMA] Ensured 'chats' table exists.")
 
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_chat_id
+        ON chats(chat_id)
+        WHERE chat_id IS NOT NULL
+    """)
+    logger.debug(
+        "[PG|INDEX] Ensured unique index on chats(chat_id) "
+        "WHERE chat_id IS NOT NULL."
+    )
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS messages (
             id SERIAL PRIMARY KEY,
@@ -65,6 +151,43 @@ def ensure_tables(cursor: PGCursor) -> None:
     )
 
 
+def dumps_json(obj) -> str:
+    """
+    Serialize an object to JSON text with orjson.
+
+    Non-ASCII characters are kept as UTF-8, like the previous
+    `json.dumps(..., ensure_ascii=False)`.
+
+    :param obj: JSON-serializable object (tuples become arrays).
+    :return: Compact JSON text.
+    """
+    return orjson.dumps(obj).decode()
+
+
+def json_param(items) -> Json | str:
+    """
+    Adapt a media/tags list for a JSONB query parameter.
+
+    Empty lists skip the `Json` adapter and its serializer entirely.
+
+    :param items: List (or tuple) of JSON-serializable items.
+    :return: `Json` adapter, or the `EMPTY_JSON_ARRAY` literal.
+    """
+    return Json(items, dumps=dumps_json) if items else EMPTY_JSON_ARRAY
+
+
+def copy_json(items) -> str:
+    """
+    Serialize a media/tags list to an escaped COPY text field.
+
+    :param items: List (or tuple) of JSON-serializable items.
+    :return: JSON array field; '[]' without serializing when empty.
+    """
+    if not items:
+        return EMPTY_JSON_ARRAY
+    return copy_field(dumps_json(items))
+
+
 def parse_iso_date(datestr: str | None) -> date | None:
     """
     Parse ISO-formatted date string into a Python date object.
@@ -97,93 +220,141 @@ def parse_timestamp(ts: str | None) -> datetime | None:
         return None
 
 
-def insert_chat(cursor: PGCursor, chat: dict) -> None:
+def insert_chat(cursor: PGCursor, chat: dict) -> int:
     """
     Insert or update a chat entry in PostgreSQL.
 
+    The upsert returns the row id. Duplicate chat_id values across
+    slugs are rejected by the partial unique index on chats(chat_id);
+    the caller must roll back.
+
     :param cursor: PostgreSQL cursor object.
     :param chat: Chat metadata dictionary.
+    :return: Internal chat ID (chats.id).
+    :raises ValueError: If 'slug' is missing or chat_id duplicates another.
     """
     slug = chat.get("slug")
     if not slug:
         logger.error("[PG|INSERT] Missing 'slug' in chat: %s", chat)
         raise ValueError("Missing required field: 'slug'")
 
-    chat_id = chat.get("chat_id")
-    if chat_id is not None:
+    try:
         cursor.execute(
-            "SELECT 1 FROM chats WHERE chat_id = %s AND slug != %s LIMIT 1;",
-            (chat_id, slug))
-        if cursor.fetchone():
-            logger.error(
-                "[PG|INSERT] Duplicate chat_id=%s found for another slug.",
-                chat_id)
-            raise ValueError(
-                f"Chat ID {chat_id} already exists in another chat "
-                f"(slug ≠ {slug})"
-            )
-
-    cursor.execute(
-        """
-        INSERT INTO chats (
-            slug, chat_id, type, name, link, image,
-            joined, is_active, is_member, is_public, notes
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (slug) DO UPDATE SET
-            chat_id = EXCLUDED.chat_id,
-            type = EXCLUDED.type,
-            name = EXCLUDED.name,
-            link = EXCLUDED.link,
-            image = EXCLUDED.image,
-            joined = EXCLUDED.joined,
-            is_active = EXCLUDED.is_active,
-            is_member = EXCLUDED.is_member,
-            is_public = EXCLUDED.is_public,
-            notes = EXCLUDED.notes
-    """, (chat["slug"], chat.get("chat_id"), chat.get("type"),
-          chat["name"], chat.get("link"), chat.get("image"),
-          parse_iso_date(chat.get("joined")),
-          chat["is_active"], chat["is_member"], chat["is_public"],
-          chat.get("notes")))
+            UPSERT_CHAT_SQL,
+            (chat["slug"], chat.get("chat_id"), chat.get("type"),
+             chat["name"], chat.get("link"), chat.get("image"),
+             parse_iso_date(chat.get("joined")),
+             chat["is_active"], chat["is_member"], chat["is_public"],
+             chat.get("notes")))
+    except UniqueViolation as e:
+        if e.diag.constraint_name != "idx_unique_chat_id":
+            raise
+        logger.error(
+            "[PG|INSERT] Duplicate chat_id=%s found for another slug.",
+            chat.get("chat_id"))
+        raise ValueError(
+            f"Chat ID {chat.get('chat_id')} already exists in another chat "
+            f"(slug ≠ {slug})"
+        ) from e
+    chat_ref_id = cursor.fetchone()[0]
     logger.debug("[PG|INSERT] Chat inserted or updated: '%s'.", chat["slug"])
+    return chat_ref_id
 
 
-def insert_message(cursor: PGCursor, msg: dict, chat_ref_id: int) -> None:
+def insert_messages(cursor: PGCursor, messages: list[dict],
+                    chat_ref_id: int) -> None:
     """
-    Insert a message entry into PostgreSQL.
+    Insert a batch of messages into PostgreSQL.
+
+    Rows are sent as multi-row INSERT statements via `execute_values`;
+    messages whose msg_id already exists in the same chat are skipped.
 
     :param cursor: PostgreSQL cursor object.
-    :param msg: Message data dictionary.
+    :param messages: List of message data dictionaries.
     :param chat_ref_id: ID of the parent chat (foreign key to chats.id).
     """
-    timestamp = parse_timestamp(msg.get("timestamp"))
-    msg_id = msg.get("msg_id")
-    media_json = Json(msg.get("media", []))
-    tags_json = Json(msg.get("tags", []))
+    rows = []
+    for msg in messages:
+        rows.append((
+            msg.get("msg_id"), chat_ref_id,
+            parse_timestamp(msg.get("timestamp")),
+            msg.get("link"), msg.get("text"),
+            json_param(msg.get("media")),
+            msg.get("screenshot"),
+            json_param(msg.get("tags")),
+            msg.get("notes")
+        ))
 
-    # === Skip if msg_id already exists in the same chat ===
-    if msg_id is not None:
-        cursor.execute(
-            """
-            SELECT 1 FROM messages
-            WHERE chat_ref_id = %s AND msg_id = %s
-            LIMIT 1
-            """, (chat_ref_id, msg_id))
-        if cursor.fetchone():
-            logger.debug(
-                "[PG|SKIP] Duplicate msg_id=%s in chat_ref_id=%d. Skipping.",
-                msg_id, chat_ref_id)
-            return
-
-    # === Insert message regardless of msg_id presence ===
-    cursor.execute(
-        """
-        INSERT INTO messages (
-            msg_id, chat_ref_id, timestamp, link, text,
-            media, screenshot, tags, notes
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (msg_id, chat_ref_id, timestamp, msg.get("link"), msg.get("text"),
-              media_json, msg.get("screenshot"), tags_json, msg.get("notes")))
-
-    logger.debug("[PG|INSERT] Message inserted (msg_id=%s, chat_ref_id=%d).",
-                 str(msg_id), chat_ref_id)
+    execute_values(cursor, INSERT_MESSAGES_SQL, rows,
+                   template=MESSAGE_VALUES_TEMPLATE, page_size=1000)
+
+    logger.debug("[PG|INSERT] Inserted %d messages (chat_ref_id=%d).",
+                 len(rows), chat_ref_id)
+
+
+def copy_field(value) -> str:
+    """
+    Format a value as a field of PostgreSQL COPY text format.
+
+    :param value: Field value (None becomes \\N).
+    :return: Escaped field string.
+    """
+    if value is None:
+        return "\\N"
+    return str(value).translate(COPY_ESCAPE_TABLE)
+
+
+def create_stage_table(cursor: PGCursor) -> None:
+    """
+    Create the session's temporary staging table used by COPY loads.
+
+    Temporary tables live until the connection is closed, so this runs
+    once per session (and must be committed) rather than per chat.
+
+    :param cursor: PostgreSQL cursor object.
+    """
+    cursor.execute(CREATE_STAGE_SQL)
+    logger.debug("[PG|SCHEMA] Ensured temporary 'messages_stage' table.")
+
+
+def copy_messages(cursor: PGCursor, messages: list[dict],
+                  chat_ref_id: int) -> None:
+    """
+    Bulk-load a batch of messages into PostgreSQL using COPY.
+
+    Rows are streamed into a temporary staging table and then moved
+    into `messages` with a single INSERT ... SELECT, so duplicate
+    msg_ids in the same chat are still skipped. Faster than
+    `insert_messages` for large chats. The staging table must have
+    been created on this session with `create_stage_table`.
+
+    :param cursor: PostgreSQL cursor object.
+    :param messages: List of message data dictionaries.
+    :param chat_ref_id: ID of the parent chat (foreign key to chats.id).
+    """
+    buf = io.StringIO()
+    # Numeric and timestamp fields never need escaping; '[]' neither
+    ref_field = str(chat_ref_id)
+    for msg in messages:
+        msg_id = msg.get("msg_id")
+        timestamp = parse_timestamp(msg.get("timestamp"))
+        buf.write("\t".join((
+            "\\N" if msg_id is None else str(msg_id),
+            ref_field,
+            timestamp.isoformat() if timestamp else "\\N",
+            copy_field(msg.get("link")),
+            copy_field(msg.get("text")),
+            copy_json(msg.get("media")),
+            copy_field(msg.get("screenshot")),
+            copy_json(msg.get("tags")),
+            copy_field(msg.get("notes"))
+        )))
+        buf.write("\n")
+    buf.seek(0)
+
+    cursor.execute("TRUNCATE messages_stage")
+    cursor.copy_expert(COPY_STAGE_SQL, buf)
+    cursor.execute(MOVE_STAGE_SQL)
+
+    logger.debug("[PG|COPY] Copied %d messages (chat_ref_id=%d).",
+                 len(messages), chat_ref_id)
@@ -4,13 +4,43 @@ SQLite writer utilities for Telegram chat and message data (Arcanum App).
 Handles table creation and data insertion into the SQLite database.
 """
 
-import json
 import logging
 import sqlite3
+import orjson
 from sqlite3 import Cursor
 
 logger = logging.getLogger(__name__)
 
+# === Statements reused across calls ===
+UPSERT_CHAT_SQL = """
+    INSERT INTO chats (
+        slug, chat_id, type, name, link, image,
+        joined, is_active, is_member, is_public, notes
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(slug) DO UPDATE SET
+        chat_id = excluded.chat_id,
+        type = excluded.type,
+        name = excluded.name,
+        link = excluded.link,
+        image = excluded.image,
+        joined = excluded.joined,
+        is_active = excluded.is_active,
+        is_member = excluded.is_member,
+        is_public = excluded.is_public,
+        notes = excluded.notes
+    RETURNING id
+"""
+INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (
+        msg_id, chat_ref_id, timestamp, link, text,
+        media, screenshot, tags, notes
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT DO NOTHING
+"""
+
+# === Stored text of an empty media/tags list ===
+EMPTY_JSON_ARRAY = "[]"
+
 
 def enable_foreign_keys(connection: sqlite3.Connection) -> None:
     """
@@ -22,6 +52,49 @@ def enable_foreign_keys(connection: sqlite3.Connection) -> None:
     logger.debug("[DB|INIT] Foreign key constraints enabled.")
 
 
+def enable_wal(connection: sqlite3.Connection) -> None:
+    """
+    Switch SQLite to WAL journaling tuned for bulk writes.
+
+    Uses synchronous=NORMAL (safe with WAL), in-memory temp storage,
+    a 64 MB page cache and 256 MB of memory-mapped reads to cut fsyncs
+    and I/O during imports. Write batches should start with
+    `BEGIN IMMEDIATE` so the write lock is taken up front.
+
+    :param connection: SQLite connection object.
+    """
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA temp_store=MEMORY")
+    connection.execute("PRAGMA cache_size=-64000")
+    connection.execute("PRAGMA mmap_size=268435456")
+    logger.debug("[DB|INIT] WAL journal mode enabled.")
+
+
+def optimize(connection: sqlite3.Connection) -> None:
+    """
+    Let SQLite refresh planner statistics that have gone stale.
+
+    Meant to run once before closing a connection that wrote data.
+
+    :param connection: SQLite connection object.
+    """
+    connection.execute("PRAGMA optimize")
+    logger.debug("[DB|OPTIMIZE] PRAGMA optimize done.")
+
+
+def json_text(items) -> str:
+    """
+    Serialize a media/tags list to JSON text for storage.
+
+    :param items: List (or tuple) of JSON-serializable items.
+    :return: JSON array text; '[]' without serializing when empty.
+    """
+    if not items:
+        return EMPTY_JSON_ARRAY
+    return orjson.dumps(items).decode()
+
+
 def ensure_tables(cursor: Cursor) -> None:
     """
     Ensure required tables exist in the SQLite database.
@@ -46,6 +119,16 @@ def ensure_tables(cursor: Cursor) -> None:
     """)
     logger.debug("[DB|SCHEMA] Ensured 'chats' table exists.")
 
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_chat_id
+        ON chats(chat_id)
+        WHERE chat_id IS NOT NULL
+    """)
+    logger.debug(
+        "[DB|INDEX] Ensured unique index on chats(chat_id) "
+        "WHERE chat_id IS NOT NULL."
+    )
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS messages (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -74,12 +157,61 @@ def ensure_tables(cursor: Cursor) -> None:
     )
 
 
-def insert_chat(cursor: Cursor, chat: dict) -> None:
+def ensure_read_indexes(cursor: Cursor) -> None:
+    """
+    Ensure indexes for reading messages per chat in time order exist.
+
+    Meant to run after a bulk load: building the index once over the
+    loaded rows is cheaper than maintaining it during inserts. Also
+    refreshes planner statistics with ANALYZE.
+
+    :param cursor: SQLite cursor object.
+    """
+    cursor.execute("PRAGMA cache_size=-200000")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_messages_chat_time
+        ON messages(chat_ref_id, timestamp)
+    """)
+    cursor.execute("ANALYZE")
+    logger.debug(
+        "[DB|INDEX] Ensured index on (chat_ref_id, timestamp); ANALYZE done."
+    )
+
+
+def ensure_search_index(cursor: Cursor) -> None:
+    """
+    Ensure the FTS5 full-text index over message text is up to date.
+
+    `messages_fts` is an external-content table over `messages`. It is
+    rebuilt after each bulk load instead of being kept in sync by
+    triggers, so message inserts pay nothing for it. Query it with
+    `messages_fts MATCH ?` and join back on `messages.id = rowid`.
+
+    :param cursor: SQLite cursor object.
+    """
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            text,
+            content='messages',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    cursor.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+    logger.debug("[DB|INDEX] Rebuilt full-text index 'messages_fts'.")
+
+
+def insert_chat(cursor: Cursor, chat: dict) -> int:
     """
     Insert or update a chat entry in the SQLite database.
 
+    The row id comes back through `RETURNING` (SQLite 3.35+), so no
+    follow-up lookup by slug is needed. Duplicate chat_id values across
+    slugs are rejected by the partial unique index on chats(chat_id).
+
     :param cursor: SQLite cursor object.
     :param chat: Chat metadata dictionary.
+    :return: Internal chat ID (chats.id).
     :raises ValueError: If 'slug' is missing or chat_id duplicates another.
     """
     slug = chat.get("slug")
@@ -88,78 +220,81 @@ def insert_chat(cursor: Cursor, chat: dict) -> None:
         raise ValueError("Missing required field: 'slug'")
 
     chat_id = chat.get("chat_id")
-    if chat_id is not None:
+    try:
         cursor.execute(
-            "SELECT 1 FROM chats WHERE chat_id = ? AND slug != ? LIMIT 1;",
-            (chat_id, slug))
-        if cursor.fetchone():
-            logger.error(
-                "[DB|INSERT] Duplicate chat_id=%s found for another slug.",
-                chat_id)
-            raise ValueError(
-                f"Chat ID {chat_id} already exists in another chat "
-                f"(slug ≠ {slug})"
-            )
-
-    cursor.execute(
-        """
-        INSERT INTO chats (
-            slug, chat_id, type, name, link, image,
-            joined, is_active, is_member, is_public, notes
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(slug) DO UPDATE SET
-            chat_id = excluded.chat_id,
-            type = excluded.type,
-            name = excluded.name,
-            link = excluded.link,
-            image = excluded.image,
-            joined = excluded.joined,
-            is_active = excluded.is_active,
-            is_member = excluded.is_member,
-            is_public = excluded.is_public,
-            notes = excluded.notes
-    """,
-        (chat["slug"], chat.get("chat_id"), chat.get("type"), chat.get("name"),
-         chat.get("link"), chat.get("image"), chat.get("joined"),
-         chat.get("is_active"), chat.get("is_member"), chat.get("is_public"),
-         chat.get("notes")))
+            UPSERT_CHAT_SQL,
+            (chat["slug"], chat_id, chat.get("type"), chat.get("name"),
+             chat.get("link"), chat.get("image"), chat.get("joined"),
+             chat.get("is_active"), chat.get("is_member"),
+             chat.get("is_public"), chat.get("notes")))
+    except sqlite3.IntegrityError as e:
+        if "chats.chat_id" not in str(e):
+            raise
+        logger.error(
+            "[DB|INSERT] Duplicate chat_id=%s found for another slug.",
+            chat_id)
+        raise ValueError(
+            f"Chat ID {chat_id} already exists in another chat "
+            f"(slug ≠ {slug})"
+        ) from e
+    chat_ref_id = cursor.fetchone()[0]
     logger.debug("[DB|INSERT] Chat inserted or updated: '%s'.", slug)
+    return chat_ref_id
 
 
 def insert_message(cursor: Cursor, msg: dict, chat_ref_id: int) -> None:
     """
     Insert a message entry into the SQLite database.
 
+    A msg_id that already exists in the same chat is skipped by the
+    unique index; prefer `insert_messages` for more than a few rows.
+
     :param cursor: SQLite cursor object.
     :param msg: Message data dictionary.
     :param chat_ref_id: ID of the parent chat (foreign key to chats.id).
     """
     msg_id = msg.get("msg_id")
-    timestamp = msg.get("timestamp")
-    media_json = json.dumps(msg.get("media", []), ensure_ascii=False)
-    tags_json = json.dumps(msg.get("tags", []), ensure_ascii=False)
-
-    if msg_id is not None:
-        cursor.execute(
-            """
-            SELECT 1 FROM messages
-            WHERE chat_ref_id = ? AND msg_id = ?
-            LIMIT 1
-            """, (chat_ref_id, msg_id))
-        if cursor.fetchone():
-            logger.debug(
-                "[DB|SKIP] Duplicate msg_id=%s in chat_ref_id=%d. Skipping.",
-                msg_id, chat_ref_id)
-            return
 
     cursor.execute(
-        """
-        INSERT INTO messages (
-            msg_id, chat_ref_id, timestamp, link, text,
-            media, screenshot, tags, notes
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (msg_id, chat_ref_id, timestamp, msg.get("link"), msg.get("text"),
-              media_json, msg.get("screenshot"), tags_json, msg.get("notes")))
+        INSERT_MESSAGE_SQL,
+        (msg_id, chat_ref_id, msg.get("timestamp"), msg.get("link"),
+         msg.get("text"), json_text(msg.get("media")), msg.get("screenshot"),
+         json_text(msg.get("tags")), msg.get("notes")))
+
+    if not cursor.rowcount:
+        logger.debug(
+            "[DB|SKIP] Duplicate msg_id=%s in chat_ref_id=%d. Skipping.",
+            msg_id, chat_ref_id)
+        return
 
     logger.debug("[DB|INSERT] Message inserted (msg_id=%s, chat_ref_id=%d).",
                  str(msg_id), chat_ref_id)
+
+
+def insert_messages(cursor: Cursor, messages: list[dict],
+                    chat_ref_id: int) -> None:
+    """
+    Insert a batch of messages into the SQLite database.
+
+    Uses a single `executemany` call; messages whose msg_id already
+    exists in the same chat are skipped by the unique index.
+
+    :param cursor: SQLite cursor object.
+    :param messages: List of message data dictionaries.
+    :param chat_ref_id: ID of the parent chat (foreign key to chats.id).
+    """
+    rows = []
+    for msg in messages:
+        rows.append((
+            msg.get("msg_id"), chat_ref_id, msg.get("timestamp"),
+            msg.get("link"), msg.get("text"),
+            json_text(msg.get("media")),
+            msg.get("screenshot"),
+            json_text(msg.get("tags")),
+            msg.get("notes")
+        ))
+
+    cursor.executemany(INSERT_MESSAGE_SQL, rows)
+
+    logger.debug("[DB|INSERT] Inserted %d of %d messages (chat_ref_id=%d).",
+                 cursor.rowcount, len(rows), chat_ref_id)
@@ -5,12 +5,13 @@ Provides functions to store extracted chat and message information
 as structured JSON files for reference or debugging.
 
 Each chat's metadata is saved in `chats.json`, while messages
-are saved in individual files named `msg_{slug}.json`.
+are saved in individual files named `msg_{slug}.json`. The saved
+`chats.json` can be read back as a manifest for non-interactive runs.
 """
 
 import os
-import json
 import logging
+import orjson
 
 # === Logging ===
 logger = logging.getLogger(__name__)
@@ -19,26 +20,75 @@ logger = logging.getLogger(__name__)
 JSON_PATH = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "data", "json"))
 os.makedirs(JSON_PATH, exist_ok=True)
+CHATS_JSON_PATH = os.path.join(JSON_PATH, "chats.json")
+
+# === chats.json contents, loaded on first save (see load_chat_summaries) ===
+_CHAT_SUMMARIES: dict[str, dict] | None = None
+
+
+def write_file_atomic(path: str, data: bytes) -> bool:
+    """
+    Write `data` to `path` through a temporary file and an atomic rename.
+
+    The file is left untouched if it already holds exactly `data`
+    (sizes are compared before contents), so idempotent re-imports
+    skip the write entirely. Otherwise the data is written to
+    `path + ".tmp"`, synced once and moved over `path`, so readers
+    never see a partially written file.
+
+    :param path: Destination file path.
+    :param data: Encoded file contents.
+    :return: True if the file was written, False if it was unchanged.
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return True
+
+
+def load_chat_summaries() -> dict[str, dict]:
+    """
+    Return the in-memory chat summaries, reading chats.json on first use.
+
+    :return: Mapping of slug to chat summary, in file order.
+    """
+    global _CHAT_SUMMARIES
+    if _CHAT_SUMMARIES is None:
+        try:
+            with open(CHATS_JSON_PATH, "rb") as f:
+                entries = orjson.loads(f.read())
+        except FileNotFoundError:
+            entries = []
+        _CHAT_SUMMARIES = {c["slug"]: c for c in entries}
+    return _CHAT_SUMMARIES
 
 
 def save_chat_summary(chat: dict) -> None:
     """
-    Save or update a chat entry in chats.json.
+    Save or update a chat entry in the chat summaries.
 
     Replaces existing entry with the same slug (if any),
-    preserving a full summary of the chat’s metadata.
+    preserving a full summary of the chat’s metadata. The entry is
+    kept in memory; call `flush_chat_summaries` to write chats.json.
 
     :param chat: Chat dictionary with required metadata fields.
     """
-    path = os.path.join(JSON_PATH, "chats.json")
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            existing = json.load(f)
-    else:
-        existing = []
+    summaries = load_chat_summaries()
 
-    existing = [c for c in existing if c["slug"] != chat["slug"]]
-    existing.append({
+    # Re-inserting moves an updated chat to the end, as before
+    summaries.pop(chat["slug"], None)
+    summaries[chat["slug"]] = {
         "slug": chat["slug"],
         "chat_id": chat["chat_id"],
         "type": chat["type"],
@@ -47,27 +97,68 @@ def save_chat_summary(chat: dict) -> None:
         "joined": chat.get("joined"),
         "is_active": chat["is_active"],
         "is_member": chat["is_member"],
+        "is_public": chat.get("is_public"),
         "notes": chat["notes"]
-    })
+    }
+
+    logger.info("[JSON|SAVE] Updated chat summary for slug='%s'",
+                chat["slug"])
 
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(existing, f, ensure_ascii=False, indent=2)
 
-    logger.info("[JSON|SAVE] Updated chats.json with slug='%s'", chat["slug"])
+def flush_chat_summaries() -> None:
+    """
+    Write the in-memory chat summaries to chats.json.
+
+    Does nothing if no summary has been loaded or saved.
+    """
+    if _CHAT_SUMMARIES is None:
+        return
+
+    data = orjson.dumps(list(_CHAT_SUMMARIES.values()),
+                        option=orjson.OPT_INDENT_2)
+    written = write_file_atomic(CHATS_JSON_PATH, data)
+
+    if written:
+        logger.debug("[JSON|FLUSH] Wrote %d chats to chats.json",
+                     len(_CHAT_SUMMARIES))
+    else:
+        logger.debug("[JSON|SKIP] chats.json is unchanged")
+
+
+def load_chat_manifest(path: str | None = None) -> dict[str, dict]:
+    """
+    Load saved chat summaries as a manifest keyed by slug.
+
+    :param path: Path to a chats.json file (defaults to CHATS_JSON_PATH).
+    :return: Mapping of slug to chat summary dictionary.
+    :raises FileNotFoundError: If the manifest file does not exist.
+    :raises ValueError: If the file is not valid JSON.
+    """
+    path = path or CHATS_JSON_PATH
+    with open(path, "rb") as f:
+        entries = orjson.loads(f.read())
+
+    manifest = {c["slug"]: c for c in entries if c.get("slug")}
+    logger.info("[JSON|LOAD] Loaded %d chat entries from %s",
+                len(manifest), path)
+    return manifest
 
 
 def save_messages_to_json(slug: str, messages: list[dict]) -> None:
     """
     Save all messages of a given chat to msg_{slug}.json.
 
-    Overwrites the file if it already exists.
+    Atomically replaces the file if it already exists, and skips the
+    write if its contents would not change.
 
     :param slug: Slug of the chat whose messages are being saved.
     :param messages: List of message dictionaries.
     """
     path = os.path.join(JSON_PATH, f"msg_{slug}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(messages, f, ensure_ascii=False, indent=2)
+    if not write_file_atomic(
+            path, orjson.dumps(messages, option=orjson.OPT_INDENT_2)):
+        logger.info("[JSON|SKIP] msg_%s.json is unchanged", slug)
+        return
 
     logger.info("[JSON|SAVE] Saved %d messages to msg_%s.json", len(messages),
                 slug)